@@ -1,41 +1,78 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
-import requests
 import json
 import re
-from bs4 import BeautifulSoup
+import copy
+import tempfile
+import threading
+import time
 import os
 import base64
-import io
-from dotenv import load_dotenv
 import logging
-from PIL import Image
-import subprocess
-from datetime import datetime
-import shutil
+import zipfile
 
-ENV_PATH = os.path.join(os.path.dirname(__file__), ".env")
-load_dotenv(dotenv_path=ENV_PATH, override=True)
+# Heavy or rarely needed dependencies (requests, BeautifulSoup, dotenv, and
+# asyncio via pipeline.py) are imported on first use so a cold worker can start serving quickly.
 
-# Pre-load API keys from .env at module level
-DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
-DEEPAI_API_KEY = os.getenv('DEEPAI_API_KEY')
+ENV_PATH = os.path.join(os.path.dirname(__file__), ".env")
 
 app = Flask(__name__)
 CORS(app)
 app.logger.setLevel("DEBUG")
 
-# Log loaded keys (masked) at startup
-app.logger.info(f"DEEPSEEK_API_KEY loaded: {'yes' if DEEPSEEK_API_KEY else 'NO'}")
-app.logger.info(f"DEEPAI_API_KEY loaded: {'yes' if DEEPAI_API_KEY else 'NO'}")
+
+# ========== LAZY CONFIGURATION AND CLIENTS ==========
+
+_config = None
+_http_session = None
+_lazy_lock = threading.Lock()
+
+def get_config():
+    """Load .env on first use and return API keys and upstream endpoints"""
+    global _config
+    if _config is None:
+        with _lazy_lock:
+            if _config is None:
+                from dotenv import load_dotenv
+                load_dotenv(dotenv_path=ENV_PATH, override=True)
+                config = {
+                    "deepseek_api_key": os.getenv('DEEPSEEK_API_KEY'),
+                    "deepai_api_key": os.getenv('DEEPAI_API_KEY'),
+                    # Overridable, e.g. to point at local mock servers
+                    "deepseek_api_url": os.getenv('DEEPSEEK_API_URL', "https://api.deepseek.com/v1/chat/completions"),
+                    "deepai_api_url": os.getenv('DEEPAI_API_URL', "https://api.deepai.org/api/text2img"),
+                }
+                # Log loaded keys (masked)
+                app.logger.info(f"DEEPSEEK_API_KEY loaded: {'yes' if config['deepseek_api_key'] else 'NO'}")
+                app.logger.info(f"DEEPAI_API_KEY loaded: {'yes' if config['deepai_api_key'] else 'NO'}")
+                _config = config
+    return _config
+
+def get_http_session():
+    """Shared HTTP client for provider calls, created on first use.
+
+    Reusing one session keeps connections to DeepSeek/DeepAI alive between
+    conversions. Cookies are never stored, so nothing leaks between requests.
+    """
+    global _http_session
+    if _http_session is None:
+        with _lazy_lock:
+            if _http_session is None:
+                import requests
+                from http.cookiejar import DefaultCookiePolicy
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                _http_session = session
+    return _http_session
 
 class BlogToInstagram:
     def __init__(self, deepseek_api_key, deepai_api_key=None):
         self.deepseek_api_key = deepseek_api_key
         self.deepai_api_key = deepai_api_key
-        self.deepseek_url = "https://api.deepseek.com/v1/chat/completions"
-        self.deepai_url = "https://api.deepai.org/api/text2img"
+        config = get_config()
+        self.deepseek_url = config["deepseek_api_url"]
+        self.deepai_url = config["deepai_api_url"]
         self.headers_deepseek = {
             "Authorization": f"Bearer {deepseek_api_key}",
             "Content-Type": "application/json"
@@ -45,10 +82,15 @@ class BlogToInstagram:
             "Api-Key": deepai_api_key if deepai_api_key else ""
         }
 
+    @property
+    def http(self):
+        return get_http_session()
+
     def extract_blog_content(self, url):
         """Extract text content from a blog URL"""
+        from bs4 import BeautifulSoup
         try:
-            response = requests.get(url, timeout=10)
+            response = self.http.get(url, timeout=10)
             soup = BeautifulSoup(response.content, 'html.parser')
 
             # Remove scripts and styles
@@ -97,7 +139,7 @@ class BlogToInstagram:
         }
 
         try:
-            response = requests.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
+            response = self.http.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
             result = response.json()
 
             if 'choices' in result:
@@ -164,7 +206,7 @@ class BlogToInstagram:
         }
 
         try:
-            response = requests.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
+            response = self.http.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
             result = response.json()
 
             if 'choices' in result:
@@ -248,7 +290,7 @@ class BlogToInstagram:
         }
 
         try:
-            response = requests.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
+            response = self.http.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
             result = response.json()
 
             if 'choices' in result:
@@ -284,16 +326,11 @@ class BlogToInstagram:
             return {"error": str(e)}
 
     def generate_post(self, blog_content, platform="instagram", blog_url=""):
-        """Generate post for specified platform"""
-        if platform == "facebook":
-            return self.generate_facebook_post(blog_content)
-        elif platform == "pinterest":
-            return self.generate_pinterest_post(blog_content, blog_url)
-        else:
-            return self.generate_instagram_post(blog_content)
+        """Generate post for specified platform (see PLATFORM_GENERATORS)"""
+        return platform_generator(platform)(self, blog_content, blog_url)
 
-    def generate_image_prompt(self, blog_content, image_description=""):
-        """Generate a detailed image generation prompt"""
+    def generate_image_prompt(self, blog_content, image_description="", summarize=True):
+        """Generate a detailed image generation prompt (and a short one unless summarize=False)"""
         if image_description:
             base_description = image_description
         else:
@@ -326,14 +363,14 @@ class BlogToInstagram:
         }
 
         try:
-            response = requests.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
+            response = self.http.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
             result = response.json()
             detailed = result['choices'][0]['message']['content']
         except Exception:
             detailed = f"Create an image showing: {base_description}"
 
         # Use AI to generate a short, one-sentence prompt from the detailed one
-        short = self.summarize_prompt_with_ai(detailed)
+        short = self.summarize_prompt_with_ai(detailed) if summarize else None
         return {"detailed": detailed, "short": short}
 
     def summarize_prompt_with_ai(self, detailed_prompt: str) -> str:
@@ -368,7 +405,7 @@ Short phrase:"""
         }
 
         try:
-            response = requests.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
+            response = self.http.post(self.deepseek_url, json=payload, headers=self.headers_deepseek)
             result = response.json()
             short = result['choices'][0]['message']['content'].strip()
             # Clean up any quotes or extra formatting
@@ -421,7 +458,7 @@ Short phrase:"""
         last_result = None
         for hdr in header_variants:
             try:
-                response = requests.post(
+                response = self.http.post(
                     self.deepai_url,
                     data={'text': prompt[:1000]},
                     headers=hdr,
@@ -449,7 +486,7 @@ Short phrase:"""
 
                 if output_url:
                     try:
-                        img_response = requests.get(output_url, timeout=30)
+                        img_response = self.http.get(output_url, timeout=30)
                         img_response.raise_for_status()
                         img_base64 = base64.b64encode(img_response.content).decode('utf-8')
                         return {
@@ -487,7 +524,7 @@ Short phrase:"""
                 # Retry once with sanitized prompt
                 for hdr in header_variants:
                     try:
-                        response = requests.post(
+                        response = self.http.post(
                             self.deepai_url,
                             data={'text': sanitized[:1000]},
                             headers=hdr,
@@ -511,7 +548,7 @@ Short phrase:"""
                                 output_url = result['output_urls'][0]
 
                         if output_url:
-                            img_response = requests.get(output_url, timeout=30)
+                            img_response = self.http.get(output_url, timeout=30)
                             img_response.raise_for_status()
                             img_base64 = base64.b64encode(img_response.content).decode('utf-8')
                             return {
@@ -554,6 +591,100 @@ Short phrase:"""
         return f"{prefix} {sanitized}"
 
 
+# ========== CONVERSION PIPELINE ==========
+
+# Pluggable post generators: platform -> func(processor, blog_content, blog_url)
+PLATFORM_GENERATORS = {}
+
+# Pluggable image providers: name -> func(processor, prompt) returning the
+# same dict shape as generate_image_with_deepai
+IMAGE_PROVIDERS = {}
+DEFAULT_IMAGE_PROVIDER = "deepai"
+
+def register_platform(name):
+    """Decorator registering a post generator for a platform"""
+    def decorator(func):
+        PLATFORM_GENERATORS[name] = func
+        return func
+    return decorator
+
+def register_image_provider(name):
+    """Decorator registering an image provider"""
+    def decorator(func):
+        IMAGE_PROVIDERS[name] = func
+        return func
+    return decorator
+
+def platform_generator(platform):
+    """Post generator for `platform`, falling back to Instagram for unknown names"""
+    if isinstance(platform, str) and platform in PLATFORM_GENERATORS:
+        return PLATFORM_GENERATORS[platform]
+    return PLATFORM_GENERATORS["instagram"]
+
+def parse_image_provider(value):
+    """Validate a requested image provider name; raises ValueError for unknown ones"""
+    if value is None:
+        return DEFAULT_IMAGE_PROVIDER
+    if not isinstance(value, str) or value not in IMAGE_PROVIDERS:
+        raise ValueError(f"Unknown image_provider; expected one of: {', '.join(sorted(IMAGE_PROVIDERS))}")
+    return value
+
+@register_platform("instagram")
+def _instagram_post(processor, blog_content, blog_url):
+    return processor.generate_instagram_post(blog_content)
+
+@register_platform("facebook")
+def _facebook_post(processor, blog_content, blog_url):
+    return processor.generate_facebook_post(blog_content)
+
+@register_platform("pinterest")
+def _pinterest_post(processor, blog_content, blog_url):
+    return processor.generate_pinterest_post(blog_content, blog_url)
+
+@register_image_provider("deepai")
+def _deepai_image(processor, prompt):
+    return processor.generate_image_with_deepai(prompt)
+
+
+def build_conversion_pipeline(platform, image_provider=DEFAULT_IMAGE_PROVIDER):
+    """Stage graph for /api/process.
+
+    blog -> post
+    blog (+ post's image_description hint) -> image_prompt -> image_prompt_short
+                                                           -> image
+
+    Stages run with a context holding `processor` and `url`. The image prompt
+    is speculative: with speculate=True it starts from the blog text alone,
+    alongside post generation, instead of waiting for the post's hint.
+    """
+    from pipeline import Pipeline, PipelineError, Stage
+
+    generate_post = platform_generator(platform)
+    generate_image = IMAGE_PROVIDERS[image_provider]
+
+    def extract(ctx):
+        blog_content = ctx["processor"].extract_blog_content(ctx["url"])
+        if "Error" in blog_content:
+            raise PipelineError(blog_content)
+        return blog_content
+
+    def image_prompt(ctx):
+        post = ctx.get("post") or {}
+        result = ctx["processor"].generate_image_prompt(
+            ctx["blog"], post.get("image_description", ""), summarize=False
+        )
+        return result["detailed"]
+
+    return Pipeline([
+        Stage("blog", extract),
+        Stage("post", lambda ctx: generate_post(ctx["processor"], ctx["blog"], ctx["url"]), requires=("blog",)),
+        Stage("image_prompt", image_prompt, requires=("blog",), hints=("post",), speculative=True),
+        Stage("image_prompt_short", lambda ctx: ctx["processor"].summarize_prompt_with_ai(ctx["image_prompt"]),
+              requires=("image_prompt",)),
+        Stage("image", lambda ctx: generate_image(ctx["processor"], ctx["image_prompt"]), requires=("image_prompt",)),
+    ])
+
+
 # ========== SETTINGS HELPER FUNCTIONS ==========
 
 SETTINGS_FILE = os.path.join(os.path.dirname(__file__), 'app_settings.json')
@@ -584,37 +715,415 @@ def get_default_settings():
         }
     }
 
+def _merge_with_defaults(saved):
+    """Fill in any categories/keys missing from saved settings"""
+    defaults = get_default_settings()
+    for category in defaults:
+        if category not in saved:
+            saved[category] = defaults[category]
+        else:
+            for key in defaults[category]:
+                if key not in saved[category]:
+                    saved[category][key] = defaults[category][key]
+    return saved
+
+
+class SettingsStore:
+    """In-memory cache of the settings file.
+
+    The parsed settings are kept until the file's identity (mtime, size, inode)
+    changes, so other worker processes pick up saves. The file is stat'ed at most
+    once per `check_interval` seconds. Writes go to a temp file in the same
+    directory followed by os.replace(), so readers never see a partial file.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._settings = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _read(self):
+        """Parse the file; caller must hold the lock"""
+        signature = self._stat_signature()
+        settings = get_default_settings()
+        if signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    settings = _merge_with_defaults(json.load(f))
+            except Exception as e:
+                app.logger.error(f"Error loading settings: {e}")
+                settings = get_default_settings()
+        self._settings = settings
+        self._signature = signature
+
+    def load(self):
+        """Return a copy of the current settings (callers may mutate it)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._settings is None:
+                self._read()
+                self._checked_at = now
+            elif now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                if self._stat_signature() != self._signature:
+                    self._read()
+            return copy.deepcopy(self._settings)
+
+    def save(self, settings):
+        """Atomically write settings and refresh the cache"""
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.app_settings.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(settings, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._settings = _merge_with_defaults(copy.deepcopy(settings))
+            self._signature = self._stat_signature()
+            self._checked_at = time.monotonic()
+
+
+settings_store = SettingsStore(SETTINGS_FILE)
+
+
 def load_settings():
-    """Load settings from JSON file"""
-    try:
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, 'r') as f:
-                saved = json.load(f)
-                # Merge with defaults to ensure all keys exist
-                defaults = get_default_settings()
-                for category in defaults:
-                    if category not in saved:
-                        saved[category] = defaults[category]
-                    else:
-                        for key in defaults[category]:
-                            if key not in saved[category]:
-                                saved[category][key] = defaults[category][key]
-                return saved
-    except Exception as e:
-        app.logger.error(f"Error loading settings: {e}")
-    return get_default_settings()
+    """Load settings (served from memory once cached)"""
+    return settings_store.load()
 
 def save_settings(settings):
     """Save settings to JSON file"""
     try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=2)
+        settings_store.save(settings)
         return True
     except Exception as e:
         app.logger.error(f"Error saving settings: {e}")
         return False
 
 
+# ========== RESPONSE SHAPING ==========
+
+# Top-level keys clients may ask for with `fields=`
+PROCESS_FIELDS = {
+    "blog_summary", "platform", "post_content", "image_prompt", "image_prompt_short",
+    "image_generation", "instagram_post", "facebook_post", "pinterest_post"
+}
+GENERATE_IMAGE_FIELDS = {"image_url", "image_base64", "image_format"}
+
+# Old per-platform copies of post_content, opt-in via `fields=`
+LEGACY_POST_KEYS = {
+    "instagram_post": "instagram",
+    "facebook_post": "facebook",
+    "pinterest_post": "pinterest"
+}
+
+# Always returned so clients can tell success from failure
+ALWAYS_INCLUDED_FIELDS = ("success", "error")
+
+def parse_fields(value, allowed):
+    """Parse a `fields` selector into {top_level_key: set_of_subkeys or None}.
+
+    Accepts a comma-separated string or a list, e.g.
+    "post_content.caption,post_content.hashtags,image_prompt_short".
+    Returns None (meaning "everything") when no selector was given.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        raise ValueError("'fields' must be a comma-separated string or a list of field names")
+    fields = {}
+    for item in value:
+        item = str(item).strip()
+        if not item:
+            continue
+        top, _, sub = item.partition('.')
+        if top not in allowed and top not in ALWAYS_INCLUDED_FIELDS:
+            raise ValueError(f"Unknown field '{top}'. Valid fields: {', '.join(sorted(allowed))}")
+        if sub:
+            if fields.get(top, set()) is not None:
+                fields.setdefault(top, set()).add(sub)
+        else:
+            fields[top] = None
+    return fields
+
+def field_requested(fields, name):
+    return fields is None or name in fields
+
+def select_fields(data, fields):
+    """Trim a response dict down to the requested fields"""
+    if fields is None or not isinstance(data, dict):
+        return data
+    selected = {}
+    for key, value in data.items():
+        if key in ALWAYS_INCLUDED_FIELDS:
+            selected[key] = value
+        elif key in fields:
+            subkeys = fields[key]
+            if subkeys is not None and isinstance(value, dict):
+                value = {k: v for k, v in value.items() if k in subkeys or k in ALWAYS_INCLUDED_FIELDS}
+            selected[key] = value
+    return selected
+
+
+# Only text-like bodies are worth compressing; images and zips already are
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json"
+}
+COMPRESS_MIN_SIZE = 500
+
+def _brotli():
+    """Return the brotli module if installed (optional dependency)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON/HTML responses with brotli or gzip when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    accepted = request.accept_encodings
+    brotli = _brotli() if accepted.quality('br') > 0 else None
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=5)
+        encoding = 'br'
+    elif accepted.quality('gzip') > 0:
+        import gzip
+        compressed = gzip.compress(body, compresslevel=6)
+        encoding = 'gzip'
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# ========== CAMPAIGN EXPORT ==========
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+class _ZipSink:
+    """Non-seekable file-like target for ZipFile; hands written bytes to a generator.
+
+    ZipFile falls back to data descriptors when it can't seek, so entries can
+    be streamed out as soon as they are written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export_post_content(post):
+    """Find the post dict in a /api/process result (new or legacy keys)"""
+    if isinstance(post.get('post_content'), dict):
+        return post['post_content']
+    for key in LEGACY_POST_KEYS:
+        if isinstance(post.get(key), dict):
+            return post[key]
+    return {}
+
+def _export_text(value):
+    """Coerce an LLM-provided value to text (lists become one item per line)"""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '\n'.join(_export_text(item) for item in value if item is not None)
+    return str(value)
+
+def _export_list(value):
+    """Coerce an LLM-provided value to a list of strings; a plain string stays whole"""
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    if value:
+        return [str(value)]
+    return []
+
+def _export_text_files(post):
+    """Yield (filename, text) pairs for a post's captions, tags, pins and prompts.
+
+    Post content is unvalidated LLM JSON, so every value is coerced rather
+    than assumed to have the documented type.
+    """
+    content = _export_post_content(post)
+    yield 'post.json', json.dumps(content, indent=2, ensure_ascii=False)
+
+    caption = _export_text(content.get('caption') or content.get('full_post'))
+    if caption:
+        yield 'caption.txt', caption
+    hashtags = _export_list(content.get('hashtags'))
+    if hashtags:
+        yield 'hashtags.txt', ' '.join(hashtags)
+
+    pin_strategies = content.get('pinStrategies')
+    pins = []
+    for pin in (pin_strategies if isinstance(pin_strategies, list) else []):
+        if not isinstance(pin, dict):
+            continue
+        lines = [f"Pin {len(pins) + 1} ({_export_text(pin.get('type'))})",
+                 f"Title: {_export_text(pin.get('pinTitle'))}",
+                 f"Description: {_export_text(pin.get('pinDescription'))}"]
+        lines += [f"- {point}" for point in _export_list(pin.get('keyPoints'))]
+        lines.append(f"CTA: {_export_text(pin.get('callToAction'))}")
+        pins.append('\n'.join(lines))
+    if pins:
+        yield 'pins.txt', '\n\n'.join(pins)
+    keywords = _export_list(content.get('pinterestKeywords'))
+    if keywords:
+        yield 'keywords.txt', '\n'.join(keywords)
+    boards = _export_list(content.get('boardSuggestions'))
+    if boards:
+        yield 'boards.txt', '\n'.join(boards)
+
+    prompts = [_export_text(text) for text in (post.get('image_prompt'), post.get('image_prompt_short')) if text]
+    if prompts:
+        yield 'image_prompt.txt', '\n\n'.join(prompts)
+
+def _export_images(post):
+    """Yield (rendition, image dict) for every image attached to a post"""
+    image_generation = post.get('image_generation')
+    if isinstance(image_generation, dict) and image_generation.get('success'):
+        yield 'image', image_generation
+    images = post.get('images')
+    for i, image in enumerate(images if isinstance(images, list) else [], 1):
+        if isinstance(image, dict):
+            yield image.get('rendition') or f'image-{i}', image
+
+EXPORT_IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'webp', 'gif')
+
+def _image_extension(image):
+    """File extension for an exported image; only whitelisted values reach the entry name"""
+    if image.get('image_format'):
+        ext = str(image['image_format'])
+    else:
+        ext = os.path.splitext(str(image.get('image_url') or '').split('?')[0])[1]
+    ext = ext.lstrip('.').lower()
+    return ext if ext in EXPORT_IMAGE_EXTENSIONS else 'png'
+
+def _check_export_image_url(url):
+    """Only fetch images from the configured DeepAI host.
+
+    Export requests come from the browser and CORS is open, so fetching
+    arbitrary URLs would let any page read internal addresses through
+    this server. Other images must be sent as image_base64.
+    """
+    from urllib.parse import urlsplit
+    parts = urlsplit(str(url))
+    allowed = urlsplit(get_config()["deepai_api_url"])
+    if parts.scheme not in ('http', 'https') or parts.netloc.lower() != allowed.netloc.lower():
+        raise ValueError(f"image_url must point at {allowed.netloc}; send other images as image_base64")
+
+def _image_chunks(image):
+    """Yield an image's bytes, downloading URLs in chunks rather than all at once"""
+    if image.get('image_base64'):
+        yield base64.b64decode(image['image_base64'])
+    elif image.get('image_url'):
+        _check_export_image_url(image['image_url'])
+        # No redirects: they could lead off the allowed host
+        with get_http_session().get(image['image_url'], stream=True, timeout=30,
+                                    allow_redirects=False) as response:
+            response.raise_for_status()
+            if response.is_redirect:
+                raise ValueError("image_url redirected; redirects are not followed")
+            for chunk in response.iter_content(EXPORT_CHUNK_SIZE):
+                yield chunk
+    else:
+        raise ValueError("image has neither image_base64 nor image_url")
+
+def iter_campaign_zip(posts):
+    """Build a zip of exported posts, yielding bytes as each piece is written"""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for index, post in enumerate(posts, 1):
+            platform = re.sub(r'[^a-z0-9_-]', '', str(post.get('platform') or 'post').lower()) or 'post'
+            folder = f"{index:03d}-{platform}"
+
+            try:
+                for filename, text in _export_text_files(post):
+                    zf.writestr(f"{folder}/{filename}", text)
+                    yield sink.drain()
+            except Exception as e:
+                # Headers are already sent, so record the failure inside the archive
+                app.logger.exception(f"Failed to export text for {folder}")
+                zf.writestr(f"{folder}/text.error.txt", f"Could not export this post's text: {e}")
+                yield sink.drain()
+
+            used_names = set()
+            for rendition, image in _export_images(post):
+                rendition = re.sub(r'[^A-Za-z0-9_-]', '', str(rendition)) or 'image'
+                ext = _image_extension(image)
+                # Repeated renditions get -2, -3, ... so no entry is written twice
+                stem, counter = rendition, 1
+                while f"{stem}.{ext}" in used_names:
+                    counter += 1
+                    stem = f"{rendition}-{counter}"
+                used_names.add(f"{stem}.{ext}")
+                name = f"{folder}/{stem}.{ext}"
+                try:
+                    # Fetch the first chunk up front so a dead URL doesn't leave an empty entry
+                    chunks = _image_chunks(image)
+                    first = next(chunks, b'')
+                    # Images are already compressed; storing them keeps the export fast
+                    zinfo = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    with zf.open(zinfo, 'w') as dest:
+                        dest.write(first)
+                        for chunk in chunks:
+                            dest.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                except Exception as e:
+                    # Headers are already sent, so record the failure inside the archive
+                    app.logger.exception(f"Failed to export image {name}")
+                    zf.writestr(f"{name}.error.txt", f"Could not export this image: {e}")
+                yield sink.drain()
+    yield sink.drain()
+
+
 # ========== FLASK ROUTES ==========
 
 @app.route('/')
@@ -671,9 +1180,9 @@ def process_blog():
     data = request.json
     url = data.get('url')
     platform = data.get('platform', 'instagram')  # 'instagram', 'facebook', or 'pinterest'
-    # Use module-level keys loaded from .env, allow override from request
-    deepseek_key = data.get('deepseek_key') or DEEPSEEK_API_KEY
-    deepai_key = data.get('deepai_key') or DEEPAI_API_KEY
+    # Use keys loaded from .env, allow override from request
+    deepseek_key = data.get('deepseek_key') or get_config()['deepseek_api_key']
+    deepai_key = data.get('deepai_key') or get_config()['deepai_api_key']
     generate_image = data.get('generate_image', False)
 
     app.logger.debug(f"process_blog: platform={platform}, deepseek_key present: {bool(deepseek_key)}, deepai_key present: {bool(deepai_key)}")
@@ -681,70 +1190,115 @@ def process_blog():
     if not url:
         return jsonify({"error": "URL is required"}), 400
 
+    if not isinstance(platform, str):
+        return jsonify({"error": "platform must be a string"}), 400
+
+    try:
+        fields = parse_fields(data.get('fields') or request.args.get('fields'), PROCESS_FIELDS)
+        image_provider = parse_image_provider(data.get('image_provider'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     if not deepseek_key:
         return jsonify({"error": "DeepSeek API key is required. Please set DEEPSEEK_API_KEY in .env"}), 400
 
     processor = BlogToInstagram(deepseek_key, deepai_key)
 
-    # Extract blog content
-    blog_content = processor.extract_blog_content(url)
-
-    if "Error" in blog_content:
-        return jsonify({"error": blog_content}), 500
-
-    # Generate post based on platform (pass url for Pinterest)
-    post_content = processor.generate_post(blog_content, platform, url)
-
-    # Generate detailed image prompt (returns dict with 'detailed' and 'short')
-    image_prompt_result = processor.generate_image_prompt(
-        blog_content,
-        post_content.get('image_description', '')
-    )
+    # Only pay for the image prompt calls when something will use them
+    # (the DeepAI key is only needed when DeepAI is the provider)
+    has_image_key = bool(deepai_key) or image_provider != "deepai"
+    wants_image = generate_image and has_image_key and field_requested(fields, "image_generation")
+    targets = ["post"]
+    if field_requested(fields, "image_prompt"):
+        targets.append("image_prompt")
+    if field_requested(fields, "image_prompt_short"):
+        targets.append("image_prompt_short")
+    if wants_image:
+        targets.append("image")
+
+    # Extract, generate the post (pass url for Pinterest), then image prompts and image,
+    # running independent stages concurrently
+    import asyncio
+    from pipeline import PipelineError
+
+    pipeline = build_conversion_pipeline(platform, image_provider)
+    try:
+        results = asyncio.run(pipeline.run(
+            targets, {"processor": processor, "url": url}, speculate=bool(data.get('speculative'))
+        ))
+    except PipelineError as e:
+        return jsonify({"error": str(e)}), 500
 
-    # Normalize results
-    if isinstance(image_prompt_result, dict):
-        image_prompt_detailed = image_prompt_result.get('detailed')
-        image_prompt_short = image_prompt_result.get('short')
-    else:
-        image_prompt_detailed = image_prompt_result
-        image_prompt_short = None
+    blog_content = results["blog"]
+    post_content = results["post"]
 
     response_data = {
         "blog_summary": blog_content[:500] + "...",
         "platform": platform,
-        "post_content": post_content,  # Generic key for any platform
-        "instagram_post": post_content if platform == "instagram" else None,  # Keep for backwards compat
-        "facebook_post": post_content if platform == "facebook" else None,
-        "pinterest_post": post_content if platform == "pinterest" else None,
-        "image_prompt": image_prompt_detailed,
-        "image_prompt_short": image_prompt_short,
+        "post_content": post_content,
         "success": True
     }
 
-    # Generate image if requested and API key is available
-    if generate_image and deepai_key:
-        image_result = processor.generate_image_with_deepai(image_prompt_detailed)
-        response_data["image_generation"] = image_result
+    # Legacy per-platform keys are only sent when asked for by name
+    for key, key_platform in LEGACY_POST_KEYS.items():
+        if fields is not None and key in fields:
+            response_data[key] = post_content if platform == key_platform else None
+
+    if "image_prompt" in results:
+        response_data["image_prompt"] = results["image_prompt"]
+        response_data["image_prompt_short"] = results.get("image_prompt_short")
+    if "image" in results:
+        response_data["image_generation"] = results["image"]
 
-    return jsonify(response_data)
+    return jsonify(select_fields(response_data, fields))
 
 @app.route('/api/generate_image', methods=['POST'])
 def generate_image_endpoint():
     data = request.json
     prompt = data.get('prompt')
-    # Use module-level key loaded from .env, allow override from request
-    deepai_key = data.get('deepai_key') or DEEPAI_API_KEY
+    # Use key loaded from .env, allow override from request
+    deepai_key = data.get('deepai_key') or get_config()['deepai_api_key']
 
     if not prompt:
         return jsonify({"error": "Prompt is required"}), 400
 
-    if not deepai_key:
+    try:
+        fields = parse_fields(data.get('fields') or request.args.get('fields'), GENERATE_IMAGE_FIELDS)
+        image_provider = parse_image_provider(data.get('image_provider'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if image_provider == "deepai" and not deepai_key:
         return jsonify({"error": "DeepAI API key is required. Please set DEEPAI_API_KEY in .env"}), 400
 
     processor = BlogToInstagram("dummy_key", deepai_key)
-    result = processor.generate_image_with_deepai(prompt)
+    result = IMAGE_PROVIDERS[image_provider](processor, prompt)
+
+    return jsonify(select_fields(result, fields))
 
-    return jsonify(result)
+
+@app.route('/api/export', methods=['POST'])
+def export_campaign():
+    """Stream a zip of captions, hashtags, pin strategies, prompts and images.
+
+    Accepts one /api/process result, or {"posts": [result, ...]} for a batch.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({"error": "Provide a conversion result or a non-empty 'posts' list"}), 400
+    posts = data.get('posts') if 'posts' in data else [data]
+
+    if not isinstance(posts, list) or not posts or not all(isinstance(p, dict) and p for p in posts):
+        return jsonify({"error": "Provide a conversion result or a non-empty 'posts' list"}), 400
+
+    def generate():
+        for chunk in iter_campaign_zip(posts):
+            if chunk:
+                yield chunk
+
+    filename = f"campaign-export-{time.strftime('%Y%m%d-%H%M%S')}.zip"
+    return Response(generate(), mimetype='application/zip',
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 @app.route('/api/mock_image', methods=['GET'])
@@ -772,4 +1326,7 @@ if __name__ == '__main__':
     werkzeug_logger.setLevel(logging.DEBUG)
     werkzeug_logger.addHandler(handler)
 
+    # Long-running dev server: load .env up front so key status is logged at startup
+    get_config()
+
     app.run(debug=True, port=5000)
@@ -0,0 +1,299 @@
+# benchmarks/load_test.py
+"""End-to-end load benchmark against local mock upstreams.
+
+Starts the mock DeepSeek/DeepAI/blog servers, launches app.py in a child process
+pointed at them, drives each scenario with a pool of concurrent clients and
+reports throughput, p50/p95/p99 latency and the app's peak RSS.
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --scenario process --requests 500 --concurrency 16
+    python -m benchmarks.load_test --latency-ms 300 --error-rate 0.02 --json bench.json
+
+Each scenario gets a fresh app process so peak RSS is attributable to it.
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mock_upstreams import MockUpstreams, add_upstream_arguments, configs_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the Flask app with the threaded dev server and no reloader/debugger
+SERVE_SNIPPET = """
+import sys, logging
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+from app import app
+app.logger.setLevel('ERROR')
+app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True, debug=False, use_reloader=False)
+"""
+
+BENCH_KEYS = {"deepseek_key": "bench-deepseek-key", "deepai_key": "bench-deepai-key"}
+
+
+# ========== SCENARIOS ==========
+# Each scenario maps a request index to (method, path, json body).
+
+def _process_request(upstreams, i, generate_image=False):
+    platform = ("instagram", "facebook", "pinterest")[i % 3]
+    body = {"url": upstreams.blog_url, "platform": platform, "generate_image": generate_image}
+    body.update(BENCH_KEYS)
+    return "POST", "/api/process", body
+
+
+def _process_speculative_request(upstreams, i):
+    method, path, body = _process_request(upstreams, i, generate_image=True)
+    body["speculative"] = True
+    return method, path, body
+
+
+# Mirrors RENDERED_POST_KEYS in templates/index.html
+UI_POST_KEYS = {
+    "instagram": ["caption", "hashtags"],
+    "facebook": ["hook", "body", "cta", "engagement_prompt", "visuals_guide", "full_post"],
+    "pinterest": ["summary", "targetAudience", "pinterestKeywords", "boardSuggestions",
+                  "pinStrategies", "image_description"],
+}
+
+
+def _process_sparse_request(upstreams, i):
+    # Same field selection the web UI sends
+    method, path, body = _process_request(upstreams, i, generate_image=True)
+    body["fields"] = (["platform", "image_prompt", "image_prompt_short", "image_generation.image_base64",
+                       "image_generation.image_format"] +
+                      [f"post_content.{key}" for key in UI_POST_KEYS[body["platform"]]])
+    return method, path, body
+
+
+def _generate_image_request(upstreams, i):
+    body = {"prompt": f"A sunlit backyard vegetable garden, variation {i}"}
+    body.update(BENCH_KEYS)
+    return "POST", "/api/generate_image", body
+
+
+EXPORT_BATCH_SIZE = 200
+
+
+def _export_batch_request(upstreams, i):
+    # Hundreds of posts whose images are streamed from the mock DeepAI server
+    image_base = upstreams.deepai.base_url
+    posts = [{
+        "platform": ("instagram", "facebook", "pinterest")[n % 3],
+        "post_content": {"caption": f"Post {n} caption", "hashtags": ["#garden", "#spring"]},
+        "image_prompt": "A sunlit backyard vegetable garden",
+        "image_prompt_short": "Sunlit backyard garden",
+        "image_generation": {"success": True, "image_url": f"{image_base}/images/{i}-{n}.png"}
+    } for n in range(EXPORT_BATCH_SIZE)]
+    return "POST", "/api/export", {"posts": posts}
+
+
+SCENARIOS = {
+    "process": lambda upstreams, i: _process_request(upstreams, i),
+    "process_with_image": lambda upstreams, i: _process_request(upstreams, i, generate_image=True),
+    "process_speculative": _process_speculative_request,
+    "process_sparse": _process_sparse_request,
+    "generate_image": _generate_image_request,
+    "export_batch": _export_batch_request,
+}
+
+
+# ========== APP PROCESS ==========
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppProcess:
+    """app.py running in a child process, wired to the mock upstreams"""
+
+    def __init__(self, upstreams, extra_env=None):
+        self.port = _free_port()
+        env = dict(os.environ)
+        env.update(upstreams.env())
+        env.update(extra_env or {})
+        self.proc = subprocess.Popen(
+            [sys.executable, "-c", SERVE_SNIPPET, str(self.port)],
+            cwd=REPO_ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"app.py exited early with code {self.proc.returncode}")
+            try:
+                requests.get(f"{self.base_url}/api/mock_image", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.05)
+        raise RuntimeError("app.py did not start in time")
+
+    def peak_rss_kb(self):
+        """Peak resident set size of the app process, in KiB (Linux /proc only)"""
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def _children_maxrss_kb():
+    """Fallback peak RSS from rusage (covers all reaped children)"""
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+# ========== DRIVER ==========
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _has_error(response):
+    """True when a 200 response still carries an "error" payload (e.g. upstream failure)"""
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and bool(body.get("error"))
+
+
+def run_scenario(name, upstreams, total, concurrency, warmup, timeout):
+    """Drive one scenario and return a result dict"""
+    build_request = SCENARIOS[name]
+    app_proc = AppProcess(upstreams)
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def one(i):
+        method, path, body = build_request(upstreams, i)
+        start = time.perf_counter()
+        try:
+            with session().request(method, app_proc.base_url + path, json=body,
+                                   timeout=timeout, stream=True) as response:
+                if response.headers.get("Content-Type", "").startswith("application/json"):
+                    ok = response.status_code == 200 and not _has_error(response)
+                    # Bytes on the wire (requests transparently decompresses .content)
+                    size = int(response.headers.get("Content-Length") or len(response.content))
+                else:
+                    # Large downloads (e.g. exports) are counted, not buffered
+                    size = sum(len(chunk) for chunk in response.raw.stream(1024 * 1024, decode_content=False))
+                    ok = response.status_code == 200
+        except requests.RequestException:
+            ok, size = False, 0
+        return time.perf_counter() - start, ok, size
+
+    try:
+        app_proc.wait_ready()
+        counter = itertools.count()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, (next(counter) for _ in range(warmup))))
+            started = time.perf_counter()
+            samples = list(pool.map(one, (next(counter) for _ in range(total))))
+            elapsed = time.perf_counter() - started
+        peak_rss = app_proc.peak_rss_kb()
+    finally:
+        app_proc.stop()
+    if peak_rss is None:
+        peak_rss = _children_maxrss_kb()
+
+    latencies = sorted(s[0] for s in samples)
+    ok = sum(1 for s in samples if s[1])
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": ok,
+        "errors": total - ok,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_wire_bytes": int(sum(s[2] for s in samples) / total) if total else 0,
+        "peak_rss_mb": round(peak_rss / 1024.0, 1) if peak_rss else None,
+    }
+
+
+def print_table(results):
+    columns = ["scenario", "requests", "ok", "errors", "throughput_rps",
+               "p50_ms", "p95_ms", "p99_ms", "mean_wire_bytes", "peak_rss_mb"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test app.py against local mock upstreams")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before timing")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request client timeout (s)")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    add_upstream_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or list(SCENARIOS)
+    configs = configs_from_args(args)
+    results = []
+    with MockUpstreams(**configs) as upstreams:
+        for name in scenarios:
+            print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...", flush=True)
+            results.append(run_scenario(name, upstreams, args.requests, args.concurrency,
+                                        args.warmup, args.timeout))
+
+    print()
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({
+                "upstreams": {k: vars(v) for k, v in configs.items()},
+                "results": results
+            }, f, indent=2)
+        print(f"\nWrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
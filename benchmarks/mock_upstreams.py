@@ -0,0 +1,314 @@
+# benchmarks/mock_upstreams.py
+"""Local stand-ins for the services the converter talks to.
+
+Three tiny HTTP servers are provided:
+
+- DeepSeek: ``POST /v1/chat/completions`` (OpenAI-style chat-completions contract)
+- DeepAI:   ``POST /api/text2img`` returning an ``output_url``, plus ``GET /images/<id>.png``
+- Blog:     ``GET /<anything>`` returning a static HTML blog page
+
+Each server takes an ``UpstreamConfig`` with latency, error rate and payload size,
+so benchmarks can run without network access or API keys.
+
+Run standalone to poke at them by hand:
+
+    python -m benchmarks.mock_upstreams --latency-ms 200 --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class UpstreamConfig:
+    """Behaviour knobs for a mock upstream"""
+    latency_ms: float = 0.0       # Added to every response
+    jitter_ms: float = 0.0        # Uniform +/- jitter on top of latency
+    error_rate: float = 0.0       # Fraction of requests answered with HTTP 500
+    payload_bytes: int = 2000     # Approximate size of the main response body
+
+    def sleep(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+def _filler(size):
+    """Return roughly `size` characters of readable filler text"""
+    sentence = "Slow mornings, strong coffee and a garden that finally took off this spring. "
+    repeats = max(1, size // len(sentence) + 1)
+    return (sentence * repeats)[:max(size, 1)]
+
+
+def _png_bytes(size):
+    """Build a valid grayscale PNG of roughly `size` bytes (uncompressed pixels)"""
+    width = 64
+    height = max(1, size // (width + 1))
+    raw = b''.join(b'\x00' + os.urandom(width) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) +
+            chunk(b'IDAT', zlib.compress(raw, 0)) + chunk(b'IEND', b''))
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Shared plumbing; subclasses get `self.config` from the server"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, keep-alive clients
+    # hit Nagle/delayed-ACK stalls that real upstreams don't have
+    disable_nagle_algorithm = True
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, body, content_type='application/json'):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DeepSeekHandler(_MockHandler):
+    """Mimics the DeepSeek chat-completions endpoint"""
+
+    def do_POST(self):
+        payload = json.loads(self._read_body() or b'{}')
+        self.config.sleep()
+        if self.config.should_fail():
+            self._send(500, {"error": {"message": "mock upstream failure", "type": "server_error"}})
+            return
+
+        max_tokens = payload.get('max_tokens', 1000)
+        if max_tokens <= 50:
+            # summarize_prompt_with_ai asks for a short phrase
+            content = "Cozy garden at golden hour"
+        else:
+            text = _filler(self.config.payload_bytes)
+            content = json.dumps({
+                "caption": text,
+                "hashtags": ["#garden", "#coffee", "#slowliving", "#spring", "#home"],
+                "hook": text[:120],
+                "body": text,
+                "cta": "Read it here: [Link to blog]",
+                "engagement_prompt": "What grew best for you this year?",
+                "visuals_guide": "1) Photo 2) Quote card 3) Short clip",
+                "full_post": text,
+                "summary": text[:200],
+                "keyTopics": ["gardening", "mornings", "coffee"],
+                "targetAudience": "Home gardeners",
+                "pinterestKeywords": ["garden ideas", "spring garden", "slow living"],
+                "boardSuggestions": ["Garden", "Slow Living", "Spring"],
+                "pinStrategies": [{
+                    "type": "title",
+                    "focus": "Main message",
+                    "keyPoints": ["Start small", "Water early", "Enjoy it"],
+                    "callToAction": "Read More →",
+                    "pinTitle": "A Garden That Finally Took Off",
+                    "pinDescription": text[:300]
+                }],
+                "image_description": "A sunlit backyard vegetable garden with a steaming mug on a wooden table"
+            })
+
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get('model', 'deepseek-chat'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+class DeepAIHandler(_MockHandler):
+    """Mimics DeepAI text2img: POST returns an output_url served by this same server"""
+
+    def do_POST(self):
+        self._read_body()
+        self.config.sleep()
+        if self.config.should_fail():
+            self._send(500, {"status": "mock upstream failure"})
+            return
+        host, port = self.server.server_address[:2]
+        image_id = uuid.uuid4().hex
+        self._send(200, {"id": image_id, "output_url": f"http://{host}:{port}/images/{image_id}.png"})
+
+    def do_GET(self):
+        if not self.path.startswith('/images/'):
+            self._send(404, {"status": "not found"})
+            return
+        self._send(200, self.server.image_bytes, content_type='image/png')
+
+
+class BlogHandler(_MockHandler):
+    """Serves the same static blog page for every path"""
+
+    def do_GET(self):
+        self.config.sleep()
+        if self.config.should_fail():
+            self._send(500, "<html><body>Internal Server Error</body></html>", content_type='text/html')
+            return
+        self._send(200, self.server.page_bytes, content_type='text/html; charset=utf-8')
+
+
+def _blog_page(size):
+    paragraphs = _filler(size)
+    return f"""<!DOCTYPE html>
+<html>
+<head><title>What My Garden Taught Me</title><style>body {{ font-family: serif; }}</style></head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<script>window.analytics = {{}};</script>
+<article>
+<h1>What My Garden Taught Me</h1>
+<p>{paragraphs}</p>
+</article>
+<footer>&copy; Mock Blog</footer>
+</body>
+</html>""".encode('utf-8')
+
+
+class MockServer:
+    """A mock upstream running on a background thread"""
+
+    def __init__(self, handler_class, config=None, host='127.0.0.1', port=0):
+        self.config = config or UpstreamConfig()
+        self.httpd = ThreadingHTTPServer((host, port), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.image_bytes = _png_bytes(self.config.payload_bytes)
+        self.httpd.page_bytes = _blog_page(self.config.payload_bytes)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MockUpstreams:
+    """Starts DeepSeek, DeepAI and blog stand-ins together"""
+
+    def __init__(self, deepseek=None, deepai=None, blog=None, host='127.0.0.1'):
+        self.deepseek = MockServer(DeepSeekHandler, deepseek, host)
+        self.deepai = MockServer(DeepAIHandler, deepai, host)
+        self.blog = MockServer(BlogHandler, blog, host)
+
+    @property
+    def deepseek_url(self):
+        return f"{self.deepseek.base_url}/v1/chat/completions"
+
+    @property
+    def deepai_url(self):
+        return f"{self.deepai.base_url}/api/text2img"
+
+    @property
+    def blog_url(self):
+        return f"{self.blog.base_url}/2026/what-my-garden-taught-me"
+
+    def env(self):
+        """Environment variables that point app.py at these servers"""
+        return {
+            "DEEPSEEK_API_URL": self.deepseek_url,
+            "DEEPAI_API_URL": self.deepai_url,
+        }
+
+    def __enter__(self):
+        for server in (self.deepseek, self.deepai, self.blog):
+            server.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in (self.deepseek, self.deepai, self.blog):
+            server.stop()
+
+
+def add_upstream_arguments(parser):
+    """Add --<upstream>-latency-ms style options shared by the benchmark scripts"""
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Latency applied to every upstream')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of upstream requests that fail')
+    parser.add_argument('--payload-bytes', type=int, default=2000, help='Upstream response body size')
+    for name in ('deepseek', 'deepai', 'blog'):
+        parser.add_argument(f'--{name}-latency-ms', type=float, default=None)
+        parser.add_argument(f'--{name}-error-rate', type=float, default=None)
+        parser.add_argument(f'--{name}-payload-bytes', type=int, default=None)
+
+
+def configs_from_args(args):
+    """Build per-upstream configs, letting upstream-specific options win"""
+    configs = {}
+    for name in ('deepseek', 'deepai', 'blog'):
+        def pick(option, default):
+            value = getattr(args, f'{name}_{option}')
+            return default if value is None else value
+        configs[name] = UpstreamConfig(
+            latency_ms=pick('latency_ms', args.latency_ms),
+            jitter_ms=args.jitter_ms,
+            error_rate=pick('error_rate', args.error_rate),
+            payload_bytes=pick('payload_bytes', args.payload_bytes),
+        )
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run mock DeepSeek, DeepAI and blog servers')
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    with MockUpstreams(**configs_from_args(args)) as upstreams:
+        for key, value in upstreams.env().items():
+            print(f"{key}={value}")
+        print(f"Blog URL: {upstreams.blog_url}")
+        print("Press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/startup.py
+"""Cold-start benchmark: import time and time-to-first-request.
+
+Each run spawns a fresh interpreter that imports app.py and then serves one
+`/api/process` request through Flask's test client against the local mock
+upstreams. The first request includes any lazily loaded dependencies, so it
+is reported next to a second (warm) request for comparison.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 20 --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.load_test import BENCH_KEYS, REPO_ROOT, percentile
+from benchmarks.mock_upstreams import MockUpstreams, UpstreamConfig
+
+# Runs in the child; prints one JSON line with timings in milliseconds
+CHILD_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+body = json.loads(sys.argv[1])
+first = client.post('/api/process', json=body)
+t2 = time.perf_counter()
+second = client.post('/api/process', json=body)
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t2 - t1) * 1000,
+    "second_request_ms": (t3 - t2) * 1000,
+    "status": [first.status_code, second.status_code],
+}))
+"""
+
+
+def run_once(upstreams):
+    body = {"url": upstreams.blog_url, "platform": "instagram"}
+    body.update(BENCH_KEYS)
+    env = dict(os.environ)
+    env.update(upstreams.env())
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD_SNIPPET, json.dumps(body)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    sample = json.loads(out.stdout.strip().splitlines()[-1])
+    if sample["status"] != [200, 200]:
+        raise RuntimeError(f"Unexpected status codes: {sample['status']}")
+    # Process spawn + import + first response, as seen from outside
+    sample["time_to_first_request_ms"] = wall_ms - sample["second_request_ms"]
+    return sample
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app.py import time and time-to-first-request")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreter runs")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    metrics = ["import_ms", "first_request_ms", "second_request_ms", "time_to_first_request_ms"]
+    samples = []
+    # Zero-latency upstreams so only the app's own work is measured
+    config = UpstreamConfig()
+    with MockUpstreams(deepseek=config, deepai=config, blog=config) as upstreams:
+        for i in range(args.runs):
+            samples.append(run_once(upstreams))
+            print(f"run {i + 1}/{args.runs}: import {samples[-1]['import_ms']:.1f}ms, "
+                  f"first request {samples[-1]['first_request_ms']:.1f}ms", flush=True)
+
+    summary = {}
+    print()
+    print(f"{'metric':<26}{'p50_ms':>10}{'p95_ms':>10}{'min_ms':>10}")
+    for metric in metrics:
+        values = sorted(s[metric] for s in samples)
+        summary[metric] = {
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "min_ms": round(values[0], 1),
+        }
+        row = summary[metric]
+        print(f"{metric:<26}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['min_ms']:>10}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"runs": args.runs, "summary": summary, "samples": samples}, f, indent=2)
+        print(f"\nWrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# pipeline.py
+"""A small asyncio stage graph for running a conversion.
+
+Stages declare the stages they depend on. `Pipeline.run()` works out which
+stages are needed for the requested targets and starts each one as soon as its
+dependencies finish, so independent stages run concurrently. Blocking stage
+functions (like the `requests`-based API calls) run in worker threads.
+
+A stage can also declare *hints*: inputs that improve its result but aren't
+strictly needed. Normally hints are waited for like dependencies. When a
+pipeline runs with `speculate=True`, stages marked `speculative` start without
+waiting for their hints, and their function sees the hint as missing.
+"""
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """Raised by a stage to stop the whole pipeline with a user-facing message"""
+
+
+class Stage:
+    """One step of a pipeline.
+
+    `func` receives a dict with the run's initial context plus the results of
+    every stage finished so far (keyed by stage name) and returns this stage's
+    result. It may be a plain function or a coroutine function.
+    """
+
+    def __init__(self, name, func, requires=(), hints=(), speculative=False):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.hints = tuple(hints)
+        self.speculative = speculative
+
+    def dependencies(self, speculate=False):
+        """Stages that must finish before this one starts"""
+        if speculate and self.speculative:
+            return self.requires
+        return self.requires + self.hints
+
+    async def call(self, context):
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(context)
+        return await asyncio.to_thread(self.func, context)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, requires={self.requires!r}, hints={self.hints!r})"
+
+
+class Pipeline:
+    """A set of stages keyed by name; adding a stage with an existing name replaces it"""
+
+    def __init__(self, stages=()):
+        self.stages = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage):
+        self.stages[stage.name] = stage
+        return stage
+
+    def stage(self, name, requires=(), hints=(), speculative=False):
+        """Decorator form of add()"""
+        def decorator(func):
+            self.add(Stage(name, func, requires, hints, speculative))
+            return func
+        return decorator
+
+    def plan(self, targets, speculate=False):
+        """Return the names of every stage needed for `targets`, dependencies first"""
+        ordered = []
+        visiting = set()
+
+        def visit(name):
+            if name in ordered:
+                return
+            if name not in self.stages:
+                raise KeyError(f"Unknown pipeline stage '{name}'")
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].dependencies(speculate):
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    async def run(self, targets, context=None, speculate=False):
+        """Run the stages needed for `targets` and return context + all stage results"""
+        results = dict(context or {})
+        tasks = {}
+
+        async def run_stage(stage):
+            dependencies = stage.dependencies(speculate)
+            if dependencies:
+                await asyncio.gather(*(tasks[name] for name in dependencies))
+            started = time.perf_counter()
+            # Snapshot so a stage never sees results change underneath it
+            value = await stage.call(dict(results))
+            logger.debug(f"stage {stage.name} finished in {(time.perf_counter() - started) * 1000:.0f}ms")
+            results[stage.name] = value
+            return value
+
+        # Every task exists before any of them runs, so lookups in tasks never miss
+        for name in self.plan(targets, speculate):
+            tasks[name] = asyncio.ensure_future(run_stage(self.stages[name]))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return results